@@ -18,6 +18,9 @@ SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets.readonly"
 ]
 
+# Compiled once; clean_email runs for every email cell
+HTML_TAG_RE = re.compile(r"<.*?>")
+
 # ===================================================
 # GOOGLE SHEETS AUTH
 # ===================================================
@@ -37,8 +40,7 @@ def clean_email(email):
     """
     Remove HTML tags from an email string.
     """
-    clean = re.compile(r"<.*?>")
-    return re.sub(clean, "", str(email)).strip()
+    return HTML_TAG_RE.sub("", str(email)).strip()
 
 
 # ===================================================
@@ -1,12 +1,14 @@
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from undetected_chromedriver import Chrome, ChromeOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
+import httplib2
 from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 
@@ -19,11 +21,40 @@ SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 CREDENTIALS_PATH = os.path.join(os.getcwd(), "credentials.json")
 TOKEN_PATH = os.path.join(os.getcwd(), "token.json")
 URL = "https://beacon.schneidercorp.com/Application.aspx?AppID=1105&LayerID=27399&PageTypeID=2&PageID=11144"
+BATCH_ROWS = 25  # Rows buffered per column before a batchUpdate flush
+SHEETS_RETRIES = 5  # Retries (randomized exponential backoff) on 429/5xx from Sheets
+MEMORY_RELEASE_ROWS = 100  # Rows between browser cache clears / forced GC
+
+# Locators (IDs and CSS selectors instead of absolute XPaths)
+WARNING_BUTTON = (By.CSS_SELECTOR, "#appBody > div:nth-of-type(4) > div > div > div:nth-of-type(2) > div:nth-of-type(2) > a:nth-of-type(1)")
+PARCEL_INPUT = (By.ID, "ctlBodyPane_ctl02_ctl01_txtParcelID")
+OWNER_NAME1 = (By.ID, "ctlBodyPane_ctl02_ctl01_rptOwner_ctl00_sprOwnerName1_lnkUpmSearchLinkSuppressed_lnkSearch")
+LAST_SALE = (By.CSS_SELECTOR, "#ctlBodyPane_ctl11_ctl01_grdSales > tbody > tr:nth-of-type(1) > td:nth-of-type(1)")
+
+# Output column -> CSS selector for each scraped field
+FIELD_SELECTORS = {
+    "Z": f"#{OWNER_NAME1[1]}",
+    "AA": "#ctlBodyPane_ctl02_ctl01_rptOwner_ctl00_sprOwnerName2_lnkUpmSearchLinkSuppressed_lnkSearch",
+    "AB": "#ctlBodyPane_ctl02_ctl01_rptOwner_ctl00_lblOwnerAddress",
+    "AC": LAST_SALE[1],
+    "AD": "#ctlBodyPane_ctl03_ctl01_grdValuation > tbody > tr:nth-of-type(5) > td:nth-of-type(1)",
+}
+
+# Read every field in one WebDriver round-trip; missing elements come back as None (cell left untouched)
+EXTRACT_FIELDS_JS = """
+const out = {};
+for (const [col, sel] of Object.entries(arguments[0])) {
+    const el = document.querySelector(sel);
+    out[col] = el ? el.innerText.trim() : null;
+}
+return out;
+"""
 
 # Set up undetected Chrome driver
 def setup_undetected_chrome_driver():
     """Set up undetected Chrome driver with user profile and debugging options."""
     options = ChromeOptions()
+    options.page_load_strategy = "eager"  # Return on DOMContentLoaded; explicit waits cover the rest
     options.add_argument(f"--user-data-dir={USER_DATA_DIR}")
     options.add_argument(f"--profile-directory={PROFILE_DIRECTORY}")
     options.add_argument("--start-maximized")
@@ -31,6 +62,17 @@ def setup_undetected_chrome_driver():
     options.add_argument("--disable-popup-blocking")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-blink-features=AutomationControlled")
+    # Keep a long-running session's memory in check (flags that are safe in a visible browser)
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-features=TranslateUI")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-sync")
+    options.add_argument("--disable-default-apps")
+    options.add_argument("--no-first-run")
+    options.add_argument("--mute-audio")
+    options.add_argument("--js-flags=--max-old-space-size=512")
+    # Pages are scraped, not viewed: skip images (a launch flag, so nothing is saved into the user's profile)
+    options.add_argument("--blink-settings=imagesEnabled=false")
     return Chrome(options=options, use_subprocess=True)
 
 # Authenticate with Google Sheets
@@ -43,7 +85,44 @@ def authenticate_google_sheets():
         creds = flow.run_local_server(port=0)
         with open(TOKEN_PATH, "w") as token_file:
             token_file.write(creds.to_json())
-    return build("sheets", "v4", credentials=creds)
+    # Keep one pooled HTTPS connection to sheets.googleapis.com for all calls
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+    return build("sheets", "v4", http=http, cache_discovery=False)
+
+# Flush buffered column values to Google Sheets
+def flush_columns(sheets, start_row, columns):
+    """Write each buffered column as one COLUMNS-major range in a single batchUpdate."""
+    count = len(next(iter(columns.values())))
+    if not count:
+        return
+    data = [
+        {
+            "range": f"{SHEET_NAME}!{col}{start_row}:{col}{start_row + count - 1}",
+            "majorDimension": "COLUMNS",
+            "values": [values],
+        }
+        for col, values in columns.items()
+    ]
+    sheets.spreadsheets().values().batchUpdate(
+        spreadsheetId=SHEET_ID,
+        body={"valueInputOption": "RAW", "data": data}
+    ).execute(num_retries=SHEETS_RETRIES)
+
+# Hand the buffered block to the writer thread and start a fresh buffer
+def submit_block(writer, writes, sheets, start_row, columns):
+    block = {col: values.copy() for col, values in columns.items()}
+    for values in columns.values():
+        values.clear()
+    writes.append(writer.submit(flush_columns, sheets, start_row, block))
+
+# Release browser memory without restarting the driver
+def release_browser_memory(driver):
+    """Clear the HTTP cache and force a JS garbage collection over CDP."""
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        driver.execute_cdp_cmd("HeapProfiler.collectGarbage", {})
+    except Exception as e:
+        print(f"Could not release browser memory: {e}")
 
 # Perform human-like mouse movement
 def human_like_mouse_movement(driver, element):
@@ -57,116 +136,88 @@ def fetch_data_and_update_sheet():
     sheet = sheets.spreadsheets().values().get(
         spreadsheetId=SHEET_ID,
         range=f'{SHEET_NAME}!G2:G'
-    ).execute()
+    ).execute(num_retries=SHEETS_RETRIES)
     sheet_data = sheet.get('values', [])
 
     # Initialize the WebDriver once
     driver = setup_undetected_chrome_driver()  # Replace with undetected Chrome driver setup if needed
-    driver.get(URL)
 
-    for i, row in enumerate(sheet_data):
-        site = row[0] if row else None
-        if not site or not site.strip():
-            print(f"Skipping empty or blank cell at row {i + 2}")
-            continue
+    # Buffered values, one list per output column; None leaves a cell untouched
+    columns = {col: [] for col in FIELD_SELECTORS}
+    block_start = 2  # Sheet row of the first buffered value
+    rows_since_release = 0
 
-        try:
-            # Navigate back to the initial URL for the next sequence
-            driver.get(URL)
-            print(f"Processing row {i + 2} with site: {site}")
+    # Sheets writes run on one background thread while the next rows load
+    writer = ThreadPoolExecutor(max_workers=1)
+    writes = []
 
-            # Dismiss warning if present
-            try:
-                warning_button = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, '//*[@id="appBody"]/div[4]/div/div/div[2]/div[2]/a[1]'))
-                )
-                human_like_mouse_movement(driver, warning_button)
-                warning_button.click()
-                time.sleep(3)
-                print("Warning dismissed successfully.")
-            except Exception as e:
-                print("Warning button not found or clickable, continuing...")
+    try:
+        for i, row in enumerate(sheet_data):
+            fields = {}  # Stays empty for skipped or failed rows
+            site = row[0] if row else None
 
             try:
-                site_input = WebDriverWait(driver, 60).until(
-                    EC.presence_of_element_located((By.XPATH, '//*[@id="ctlBodyPane_ctl02_ctl01_txtParcelID"]'))
-                )
-                site_input.send_keys(site)
-                site_input.send_keys(Keys.RETURN)
+                if not site or not site.strip():
+                    print(f"Skipping empty or blank cell at row {i + 2}")
+                    continue
+
+                # Navigate back to the initial URL for the next sequence
+                driver.get(URL)
+                print(f"Processing row {i + 2} with site: {site}")
+
+                # Dismiss warning if present
+                try:
+                    warning_button = WebDriverWait(driver, 5).until(
+                        EC.element_to_be_clickable(WARNING_BUTTON)
+                    )
+                    human_like_mouse_movement(driver, warning_button)
+                    warning_button.click()
+                    print("Warning dismissed successfully.")
+                except Exception as e:
+                    print("Warning button not found or clickable, continuing...")
+
+                try:
+                    site_input = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                        EC.presence_of_element_located(PARCEL_INPUT)
+                    )
+                    site_input.send_keys(site)
+                    site_input.send_keys(Keys.RETURN)
+                except Exception as e:
+                    print(f"Error processing row {i + 2}: {e}")
+                    continue  # Skip to the next iteration
+
+                # Wait for the owner and sales sections, then read every field at once
+                WebDriverWait(driver, 15, poll_frequency=1.0).until(EC.presence_of_element_located(OWNER_NAME1))
+                WebDriverWait(driver, 15, poll_frequency=1.0).until(EC.presence_of_element_located(LAST_SALE))
+
+                fields = driver.execute_script(EXTRACT_FIELDS_JS, FIELD_SELECTORS)
+
             except Exception as e:
                 print(f"Error processing row {i + 2}: {e}")
-                continue  # Skip to the next iteration
-
-            # Extract and update ownership text 1
-            ownership_text1 = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 
-                    '#ctlBodyPane_ctl02_ctl01_rptOwner_ctl00_sprOwnerName1_lnkUpmSearchLinkSuppressed_lnkSearch'
-                ))
-            ).text
-            sheets.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!Z{i + 2}",
-                valueInputOption="RAW",
-                body={"values": [[ownership_text1]]}
-            ).execute()
-            
-            # Extract and update ownership text 1
-            ownership_text2 = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 
-                    '#ctlBodyPane_ctl02_ctl01_rptOwner_ctl00_sprOwnerName2_lnkUpmSearchLinkSuppressed_lnkSearch'
-                ))
-            ).text
-            sheets.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!AA{i + 2}",
-                valueInputOption="RAW",
-                body={"values": [[ownership_text2]]}
-            ).execute()
-
-            # Additional data extraction
-            additional_text = driver.find_element(By.XPATH,
-                '//*[@id="ctlBodyPane_ctl02_ctl01_rptOwner_ctl00_lblOwnerAddress"]'
-            ).text
-            sheets.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f'{SHEET_NAME}!AB{i + 2}',
-                valueInputOption='RAW',
-                body={'values': [[additional_text]]}
-            ).execute()
-
-            # Property value extraction
-            property_value = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH,
-                    '//*[@id="ctlBodyPane_ctl11_ctl01_grdSales"]/tbody/tr[1]/td[1]'
-                ))
-            ).text
-            sheets.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f'{SHEET_NAME}!AC{i + 2}',
-                valueInputOption='RAW',
-                body={'values': [[property_value]]}
-            ).execute()
-
-            # Building information extraction
-            bldg_info = driver.find_element(By.XPATH,
-                '//*[@id="ctlBodyPane_ctl03_ctl01_grdValuation"]/tbody/tr[5]/td[1]'
-            ).text
-            sheets.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f'{SHEET_NAME}!AD{i + 2}',
-                valueInputOption='RAW',
-                body={'values': [[bldg_info]]}
-            ).execute()
-    
-
-        except Exception as e:
-            print(f"Error processing row {i + 2}: {e}")
-        finally:
-            # Clear any entered data or reset state if needed
-            pass
-
-    # Quit the driver after all sequences
-    driver.quit()
+            finally:
+                # Buffer this row's values (or None) so every column stays row-aligned
+                for col, values in columns.items():
+                    values.append(fields.get(col))
+                # Write the block once it holds BATCH_ROWS rows
+                if i + 3 - block_start >= BATCH_ROWS:
+                    submit_block(writer, writes, sheets, block_start, columns)
+                    block_start = i + 3
+                # Reclaim cache and heap every MEMORY_RELEASE_ROWS processed rows
+                if site and site.strip():
+                    rows_since_release += 1
+                if rows_since_release >= MEMORY_RELEASE_ROWS:
+                    release_browser_memory(driver)
+                    rows_since_release = 0
+    finally:
+        # Write whatever is still buffered, wait for every write, then quit the driver
+        submit_block(writer, writes, sheets, block_start, columns)
+        writer.shutdown(wait=True)
+        for future in writes:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error writing to Google Sheets: {e}")
+        driver.quit()
 
 # Main execution
 if __name__ == "__main__":
@@ -1,14 +1,20 @@
 import os
-import time
 import json
+import time
+import logging
 import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+import httplib2
 from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
@@ -16,6 +22,29 @@ from pyppeteer import launch
 import re
 from urllib.parse import quote
 
+# Compiled once at import instead of on every call
+_TPS_RE = re.compile(r'^https://www\.truepeoplesearch\.com/find/address/[\w\-%#]+$')
+_PHONE_RE = re.compile(r'\(\d{3}\) \d{3}-\d{4}')
+
+logger = logging.getLogger(__name__)
+
+# Pairs each card's links with its span.h4 labels in order (arguments: space-separated card classes)
+EXTRACT_CARD_LINKS_JS = """
+(className) => {
+    const out = [];
+    const cardSelector = 'div.' + className.trim().split(/\\s+/).join('.');
+    for (const card of document.querySelectorAll(cardSelector)) {
+        const hrefs = Array.from(card.querySelectorAll('a[href]'), (a) => a.href);
+        const texts = Array.from(card.querySelectorAll('span.h4'), (s) => s.textContent);
+        const count = Math.min(hrefs.length, texts.length);
+        for (let k = 0; k < count; k++) {
+            out.push({href: hrefs[k], text: texts[k].trim()});
+        }
+    }
+    return out;
+}
+"""
+
 def format_url(address):
     address = address.replace("_", "-")  # Replace underscores with hyphens
     encoded_address = quote(address, safe="-")  # URL encode while keeping hyphens
@@ -30,8 +59,50 @@ TOKEN_PATH = os.path.join(BASE_DIR, "token.json")
 SHEET_ID = "1VUB2NdGSY0l3tuQAfkz8QV2XZpOj2khCB69r5zU1E5A"
 SHEET_NAME = "Raw Cape Coral - ArcGIS (lands)"
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
-
-# Authenticate Google Sheets API
+BATCH_ROWS = 25  # Rows of queued cell writes per batchUpdate flush
+SHEETS_RETRIES = 5  # Retries (randomized exponential backoff) on 429/5xx from Sheets
+
+# Pyppeteer browser settings (one Chromium is launched per run and shared by all pages)
+CHROME_PATH = r'C:\Program Files\Google\Chrome\Application\chrome.exe'
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36"
+MAX_PAGES = 5  # TruePeopleSearch tabs loading at the same time
+PROFILE_DIR = os.path.join(BASE_DIR, "tps_chrome_profile")  # Keeps cookies (bot-check, consent) between runs
+BROWSER_RESTART_PAGES = 200  # Relaunch Chromium between passes after this many tabs to shed leaked memory
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}  # Never read by the scraper; aborted at request time
+RESULT_BLOCK_SELECTOR = 'body > div:nth-of-type(2) > div > div:nth-of-type(2) > div:nth-of-type(5)'  # Was /html/body/div[2]/div/div[2]/div[5]
+
+# Locators (IDs and CSS selectors instead of absolute XPaths)
+STRAP_INPUT = (By.ID, "ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_STRAPTextBox")
+ISSUES_PANEL = (By.ID, "ctl00_BodyContentPlaceHolder_pnlIssues")
+WARNING_BUTTON = (By.ID, "ctl00_BodyContentPlaceHolder_btnWarning")
+RESULT_LINK = (By.CSS_SELECTOR, "#ctl00_BodyContentPlaceHolder_WebTab1 > div > div:nth-of-type(1) > div:nth-of-type(1) > table > tbody > tr > td:nth-of-type(4) > div > div:nth-of-type(1) > a")
+OWNER_PANEL = (By.ID, "divDisplayParcelOwner")  # ":scope" selectors are looked up under this
+OWNERSHIP_TOGGLE = (By.CSS_SELECTOR, ":scope > div:nth-of-type(1) > div > div:nth-of-type(1) > a:nth-of-type(2) > img")
+VALUES_TAB = (By.ID, "ValuesHyperLink")
+PROPERTY_VALUE = (By.CSS_SELECTOR, "#valueGrid > tbody > tr:nth-of-type(2) > td:nth-of-type(4)")
+
+# Output column -> CSS selector for each scraped field
+FIELD_SELECTORS = {
+    "C": "#ownershipDiv > div > ul",
+    "D": ":scope > div:nth-of-type(1) > div > div:nth-of-type(2) > div",
+    "E": PROPERTY_VALUE[1],
+    "F": ":scope > div:nth-of-type(3) > table:nth-of-type(1) > tbody > tr:nth-of-type(3) > td",
+    "S": ":scope > div:nth-of-type(2) > div:nth-of-type(3)",
+}
+
+# Read every field in one WebDriver round-trip (arguments: selectors, owner panel)
+EXTRACT_FIELDS_JS = """
+const [selectors, panel] = arguments;
+const out = {};
+for (const [col, sel] of Object.entries(selectors)) {
+    const el = (sel.startsWith(':scope') ? panel : document).querySelector(sel);
+    out[col] = el ? el.innerText.trim() : '';
+}
+return out;
+"""
+
+# Authenticate Google Sheets API (built once and reused for the whole run)
+@functools.lru_cache(maxsize=1)
 def authenticate_google_sheets():
     creds = None
     if os.path.exists(TOKEN_PATH):
@@ -44,175 +115,185 @@ def authenticate_google_sheets():
             creds = flow.run_local_server(port=0)
         with open(TOKEN_PATH, "w") as token:
             token.write(creds.to_json())
-    return build("sheets", "v4", credentials=creds)
+    # Keep one pooled HTTPS connection to sheets.googleapis.com for all calls
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+    return build("sheets", "v4", http=http, cache_discovery=False)
 
 # Fetch Data from Google Sheets
 def fetch_sheet_data():
     service = authenticate_google_sheets()
     sheet = service.spreadsheets()
-    # Fetch owners (A2:A) and dynamic URLs (X2:X)
+    # Fetch owners (A2:A) and dynamic URLs (X2:X) in one request
     range_owners = f"{SHEET_NAME}!A2:A"
     range_urls = f"{SHEET_NAME}!X2:X"
-    result_owners = sheet.values().get(spreadsheetId=SHEET_ID, range=range_owners).execute()
-    result_urls = sheet.values().get(spreadsheetId=SHEET_ID, range=range_urls).execute()
-    owners = result_owners.get("values", [])
-    urls = result_urls.get("values", [])
+    result = sheet.values().batchGet(spreadsheetId=SHEET_ID, ranges=[range_owners, range_urls]).execute(num_retries=SHEETS_RETRIES)
+    value_ranges = result.get("valueRanges", [])
+    owners = value_ranges[0].get("values", []) if len(value_ranges) > 0 else []
+    urls = value_ranges[1].get("values", []) if len(value_ranges) > 1 else []
     return owners, urls
 
-# Pyppeteer Fetch Page HTML Function
-async def fetch_page_html(url):
-    try:
-        browser = await launch(
-            headless=True,
-            executablePath=r'C:\Program Files\Google\Chrome\Application\chrome.exe'
-        )
-        page = await browser.newPage()
-        await page.setUserAgent(
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36"
-        )
-        await page.goto(url, {'waitUntil': 'networkidle2', 'timeout': 60000})
-        return page, browser
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        return None, None
-
-# Pyppeteer Extract Content
-async def extract_content_from_xpath(page, xpath):
-    try:
-        elements = await page.xpath(xpath)
-        if elements:
-            content = await page.evaluate('(element) => element.textContent', elements[0])
-            return content.strip()
-    except Exception as e:
-        print(f"Error extracting content: {e}")
-    return None
+# Flush queued cell writes to Google Sheets
+def flush_updates(sheets_service, pending):
+    if not pending:
+        return
+    sheets_service.spreadsheets().values().batchUpdate(
+        spreadsheetId=SHEET_ID,
+        body={"valueInputOption": "RAW", "data": pending}
+    ).execute(num_retries=SHEETS_RETRIES)
+    pending.clear()
+
+# Setup Firefox driver with headless option
+def create_driver():
+    options = webdriver.FirefoxOptions()
+    options.add_argument("--headless")
+    options.page_load_strategy = "eager"  # Return on DOMContentLoaded; explicit waits cover the rest
+    # Pages are scraped, not viewed: skip images, notifications and autoplay
+    options.set_preference("permissions.default.image", 2)
+    options.set_preference("dom.webnotifications.enabled", False)
+    options.set_preference("media.autoplay.default", 5)
+    service = Service()
+    return webdriver.Firefox(service=service, options=options)
 
 # Main Script to Process Data
-def fetch_data_and_update_sheet():
-    owners, urls = fetch_sheet_data()
+def fetch_data_and_update_sheet(owners):
     sheets_service = authenticate_google_sheets()
 
+    # Work list of (sheet row, owner), built once with blank rows dropped
+    rows = [(i, row[0]) for i, row in enumerate(owners, start=2) if row and row[0].strip()]
+    if not rows:
+        print("No owners to process.")
+        return
+
     # Uniform Target URL for A2:A
     uniform_url = 'https://www.leepa.org/Search/PropertySearch.aspx'
 
-    for i, (owner_row, url_row) in enumerate(zip(owners, urls), start=2):
-        owner = owner_row[0] if owner_row else None
-        dynamic_url = url_row[0] if url_row else None
+    # Start the browser once and reuse it for every row; it is relaunched only if it dies
+    driver = create_driver()
 
-        if not owner:
-            print(f"Skipping empty row at index {i}.")
-            continue
+    pending = []  # Cell writes queued for the next batchUpdate
+    rows_since_flush = 0
 
-        # **Step 1: Selenium-based Functionality for A2:A**
-        print(f"Processing Name: {owner} at row {i}.")
-        options = webdriver.FirefoxOptions()
-        options.add_argument("--headless")
-        service = Service()
-        driver = webdriver.Firefox(service=service, options=options)
+    # Sheets writes run on one background thread while the next owner loads
+    writer = ThreadPoolExecutor(max_workers=1)
+    writes = []
 
-        try:
-            driver.get(uniform_url)
-            strap_input = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.ID, "ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_STRAPTextBox"))
-            )
-            strap_input.send_keys(owner, Keys.RETURN)
+    try:
+        for i, owner in rows:
+            # **Step 1: Selenium-based Functionality for A2:A**
+            print(f"Processing Name: {owner} at row {i}.")
+            started = time.perf_counter()
 
             try:
-                WebDriverWait(driver, 60).until(
-                    EC.presence_of_element_located((By.ID, "ctl00_BodyContentPlaceHolder_pnlIssues"))
+                driver.get(uniform_url)
+                strap_input = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                    EC.presence_of_element_located(STRAP_INPUT)
+                )
+                strap_input.send_keys(owner, Keys.RETURN)
+
+                try:
+                    WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                        EC.presence_of_element_located(ISSUES_PANEL)
+                    )
+                    warning_button = driver.find_element(*WARNING_BUTTON)
+                    warning_button.click()
+                except (TimeoutException, NoSuchElementException):
+                    print("No pop-up found, continuing.")
+
+                # Wait for the search result link
+                href = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                    EC.presence_of_element_located(RESULT_LINK)
+                ).get_attribute('href')
+                driver.get(href)
+                # Locate the owner panel once; field lookups below are scoped under it
+                owner_panel = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                    EC.presence_of_element_located(OWNER_PANEL)
+                )
+
+                # Click image to reveal ownership details
+                img_element = owner_panel.find_element(*OWNERSHIP_TOGGLE)
+                img_element.click()
+
+                # Click Value tab and wait for the property value
+                driver.find_element(*VALUES_TAB).click()
+                WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                    EC.presence_of_element_located(PROPERTY_VALUE)
                 )
-                warning_button = driver.find_element(By.ID, "ctl00_BodyContentPlaceHolder_btnWarning")
-                warning_button.click()
-            except:
-                print("No pop-up found, continuing.")
-
-            time.sleep(7)
-
-            href = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="ctl00_BodyContentPlaceHolder_WebTab1"]/div/div[1]/div[1]/table/tbody/tr/td[4]/div/div[1]/a'))
-            ).get_attribute('href')
-            driver.get(href)
-            # Click image to reveal ownership details
-            img_element = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[1]/div/div[1]/a[2]/img'))
-            )
-            img_element.click()
-
-            ownership_text = driver.find_element(By.XPATH, '//*[@id="ownershipDiv"]/div/ul').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!C{i}",
-                valueInputOption="RAW",
-                body={"values": [[ownership_text]]}
-            ).execute()
-
-            additional_text = driver.find_element(By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[1]/div/div[2]/div').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!D{i}",
-                valueInputOption="RAW",
-                body={"values": [[additional_text]]}
-            ).execute()
-
-            # Click Value tab and extract property value
-            value_tab = driver.find_element(By.ID, "ValuesHyperLink").click()
-            property_value = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="valueGrid"]/tbody/tr[2]/td[4]'))
-            ).text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!E{i}",
-                valueInputOption="RAW",
-                body={"values": [[property_value]]}
-            ).execute()
-
-            building_info = driver.find_element(By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[3]/table[1]/tbody/tr[3]/td').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!F{i}",
-                valueInputOption="RAW",
-                body={"values": [[building_info]]}
-            ).execute()
-
-            full_site = driver.find_element(By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[2]/div[3]').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!S{i}",
-                valueInputOption="RAW",
-                body={"values": [[full_site]]}
-            ).execute()
-            print(f"Ownership data updated for row {i}: {ownership_text}")
+
+                fields = driver.execute_script(EXTRACT_FIELDS_JS, FIELD_SELECTORS, owner_panel)
+                for col, value in fields.items():
+                    pending.append({"range": f"{SHEET_NAME}!{col}{i}", "values": [[value]]})
+                print(f"Ownership data updated for row {i}: {fields['C']}")
         
-        except Exception as e:
-            print(f"Error processing Name: {owner} at row {i}: {e}")
-            
-async def fetch_page_html(dynamic_url):
+            except Exception as e:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                logger.warning("row=%d elapsed_ms=%.0f error=%s: %s", i, elapsed_ms, type(e).__name__, e)
+            finally:
+                # Clear cookies between owners; a browser that can't be reset has died, so relaunch it
+                try:
+                    driver.delete_all_cookies()
+                except WebDriverException as e:
+                    print(f"Browser lost at row {i}, relaunching: {e}")
+                    try:
+                        driver.quit()
+                    except WebDriverException:
+                        pass
+                    driver = create_driver()
+
+            # Flush queued writes every BATCH_ROWS processed rows
+            rows_since_flush += 1
+            if rows_since_flush >= BATCH_ROWS:
+                writes.append(writer.submit(flush_updates, sheets_service, pending.copy()))
+                pending.clear()
+                rows_since_flush = 0
+
+    finally:
+        # Write whatever is still queued and wait for every write
+        writes.append(writer.submit(flush_updates, sheets_service, pending.copy()))
+        pending.clear()
+        writer.shutdown(wait=True)
+        for future in writes:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error writing to Google Sheets: {e}")
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass  # Already gone (a relaunch failed mid-run)
+
+# Abort requests for resources the scraper never reads; let everything else through
+async def block_heavy_requests(request):
+    if request.resourceType in BLOCKED_RESOURCE_TYPES:
+        await request.abort()
+    else:
+        await request.continue_()
+
+# Open a new tab on the shared browser and load the URL; the caller closes the page
+async def fetch_page_html(browser, dynamic_url):
     if not isinstance(dynamic_url, str) or not dynamic_url.startswith("http"):
         print(f"Invalid URL: {dynamic_url}")
-        return None, None  # Skip invalid URLs
+        return None  # Skip invalid URLs
     
+    page = None
     try:
         print(f"Navigating to: {dynamic_url}")  # Debugging print
-        browser = await launch(
-            headless=True,
-            executablePath=r'C:\Program Files\Google\Chrome\Application\chrome.exe'
-        )
         page = await browser.newPage()
-        await page.setUserAgent(
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36"
-        )
-        await page.goto(dynamic_url, {'waitUntil': 'networkidle2', 'timeout': 60000})
-        return page, browser
+        await page.setUserAgent(USER_AGENT)
+        await page.setRequestInterception(True)
+        page.on('request', lambda request: asyncio.ensure_future(block_heavy_requests(request)))
+        # Results are server-rendered; process_url waits for the exact node it reads
+        await page.goto(dynamic_url, {'waitUntil': 'domcontentloaded', 'timeout': 60000})
+        return page
     except Exception as e:
         print(f"Error fetching {dynamic_url}: {e}")
-        return None, None
+        if page:
+            await page.close()
+        return None
 
-async def extract_content_from_xpath(page, xpath):
-    elements = await page.xpath(xpath)
-    if elements:
-        content = await page.evaluate('(element) => element.textContent', elements[0])
-        return content.strip()
-    return None
+async def extract_content(page, selector):
+    # Read the block's text in one round-trip instead of an XPath lookup plus a second evaluate
+    content = await page.evaluate('(sel) => { const el = document.querySelector(sel); return el ? el.textContent : null; }', selector)
+    return content.strip() if content else None
 
 async def extract_phone_numbers(page):
     # Locate the section that contains "Phone Numbers"
@@ -224,99 +305,108 @@ async def extract_phone_numbers(page):
         raw_text = await page.evaluate('(element) => element.innerText', element)
         
         # Extract properly formatted phone numbers
-        extracted_numbers = re.findall(r'\(\d{3}\) \d{3}-\d{4}', raw_text)
+        extracted_numbers = _PHONE_RE.findall(raw_text)
         phone_numbers.extend(extracted_numbers)
 
     # Return the extracted phone numbers, or default message if none found
     return phone_numbers if phone_numbers else ["No phone numbers found"]
 
+# Collect (href, span.h4 text) pairs from every matching card in one page.evaluate
 async def extract_hrefs_and_span_h4_within_class(page, class_name):
-    elements = await page.xpath(f'//div[contains(@class, "{class_name}")]')
-    extracted_data = []
+    return await page.evaluate(EXTRACT_CARD_LINKS_JS, class_name)
 
-    for element in elements:
-        href_elements = await element.xpath('.//a[@href]')
-        hrefs = [await page.evaluate('(element) => element.href', el) for el in href_elements]
+def is_valid_url(url):
+    """Validates if the URL is a properly formatted TruePeopleSearch URL."""
+    return bool(_TPS_RE.match(url))
 
-        span_h4_elements = await element.xpath('.//span[contains(@class, "h4")]')
-        span_h4_texts = [await page.evaluate('(element) => element.textContent', el) for el in span_h4_elements]
+# Launch the Chromium shared by every TruePeopleSearch tab
+async def launch_browser():
+    return await launch(headless=True, executablePath=CHROME_PATH, userDataDir=PROFILE_DIR)
 
-        for href, text in zip(hrefs, span_h4_texts):
-            extracted_data.append({'href': href, 'text': text.strip()})
+async def main():
+    # Bounds how many tabs load at once so TruePeopleSearch isn't hit too hard
+    semaphore = asyncio.Semaphore(MAX_PAGES)
+    browser = await launch_browser()
+    pages_since_launch = 0
+    try:
+        while True:
+            if pages_since_launch >= BROWSER_RESTART_PAGES:
+                await browser.close()
+                browser = await launch_browser()
+                pages_since_launch = 0
+            pages_since_launch += await run_pass(browser, semaphore)
+    finally:
+        await browser.close()
+
+# Load one TruePeopleSearch URL on its own tab and print what it contains
+async def process_url(browser, semaphore, url):
+    async with semaphore:
+        page = None
+        try:
+            page = await fetch_page_html(browser, url)
 
-    return extracted_data
+            if page:
+                print("Page fetched successfully!")
 
-def format_url(address):
-    """Formats the address properly for TruePeopleSearch URLs."""
-    address = address.replace("_", "-")  # Replace underscores with hyphens
-    encoded_address = quote(address, safe="-")  # URL encode but keep hyphens
-    return f"https://www.truepeoplesearch.com/find/address/{encoded_address}"
+                # Extract the result block using its CSS selector
+                try:
+                    await page.waitForSelector(RESULT_BLOCK_SELECTOR, {'timeout': 15000})
+                    content = await extract_content(page, RESULT_BLOCK_SELECTOR)
+                    if content:
+                        first_line = content.strip().split("\n")[0]
+                        print(f"Content extracted from result block: {first_line}")
+                    else:
+                        print("No content found at the result block selector.")
+                except Exception as e:
+                    print(f"Error extracting content: {e}")
 
-def is_valid_url(url):
-    """Validates if the URL is a properly formatted TruePeopleSearch URL."""
-    pattern = re.compile(r'^https://www\.truepeoplesearch\.com/find/address/[\w\-%#]+$')
-    return bool(pattern.match(url))
+                # Extract and format phone numbers
+                phone_numbers = await extract_phone_numbers(page)
+                print("\nPhone Numbers:")
+                print(f"  {phone_numbers}")
 
-async def main():
-    while True:
-        fetch_data_and_update_sheet()
-        owners, urls = fetch_sheet_data()
-
-        for owner, url in zip(owners, urls):
-            if isinstance(url, list) and url:  # Ensure `url` is not an empty list
-                url = url[0]  # Extract the string from the list
-            
-            if is_valid_url(url):  # Check if the URL is properly formatted
+                # Extract required links and corresponding text
+                class_name = 'card card-body shadow-form pt-3'
                 try:
-                    page, browser = await fetch_page_html(url)
-
-                    if page:
-                        print("Page fetched successfully!")
-
-                        # Extract specific content using XPath
-                        xpath = '/html/body/div[2]/div/div[2]/div[5]'
-                        try:
-                            await page.waitForXPath(xpath, {'timeout': 60000})
-                            content = await extract_content_from_xpath(page, xpath)
-                            if content:
-                                first_line = content.strip().split("\n")[0]
-                                print(f"Content extracted from XPath: {first_line}")
-                            else:
-                                print("No content found at the specified XPath.")
-                        except Exception as e:
-                            print(f"Error extracting content: {e}")
-
-                        # Extract and format phone numbers
-                        phone_numbers = [
-                            "(608) 328-4626", "(608) 445-9693", 
-                            "(608) 238-4626", "(608) 329-4897"
-                        ]
-                        print("\nPhone Numbers:")
-                        print(f"  {phone_numbers}")
-
-                        # Extract required links and corresponding text
-                        class_name = 'card card-body shadow-form pt-3'
-                        try:
-                            extracted_data = await extract_hrefs_and_span_h4_within_class(page, class_name)
-                            if extracted_data:
-                                print("\nExtracted Data:")
-                                for item in extracted_data:
-                                    text_cleaned = item['text'].strip()
-                                    print(f"  Href: {item['href']}, Text: {text_cleaned}")
-                            else:
-                                print(f"No data found in elements with class '{class_name}'.")
-                        except Exception as e:
-                            print(f"Error extracting data by class name: {e}")
-
-                        # Close browser after processing
-                        await browser.close()
+                    extracted_data = await extract_hrefs_and_span_h4_within_class(page, class_name)
+                    if extracted_data:
+                        print("\nExtracted Data:")
+                        for item in extracted_data:
+                            text_cleaned = item['text'].strip()
+                            print(f"  Href: {item['href']}, Text: {text_cleaned}")
                     else:
-                        print("Failed to fetch the page.")
-
+                        print(f"No data found in elements with class '{class_name}'.")
                 except Exception as e:
-                    print(f"Error fetching page: {e}")
-
+                    print(f"Error extracting data by class name: {e}")
             else:
-                print(f"Skipping invalid URL: {url}")
+                print("Failed to fetch the page.")
+
+        except Exception as e:
+            print(f"Error fetching page: {e}")
+        finally:
+            # Close the tab; the browser stays up for the other URLs
+            if page:
+                await page.close()
+
+# Run one full pass over the sheet and return how many tabs it opened
+async def run_pass(browser, semaphore):
+    # Read the sheet once per full pass and share it between both stages
+    owners, urls = fetch_sheet_data()
+    fetch_data_and_update_sheet(owners)
+
+    valid_urls = {}  # Canonical URL -> URL to fetch; repeated addresses are loaded once
+    for owner, url in zip(owners, urls):
+        if isinstance(url, list) and url:  # Ensure `url` is not an empty list
+            url = url[0]  # Extract the string from the list
+        
+        if is_valid_url(url):  # Check if the URL is properly formatted
+            valid_urls.setdefault(url.strip().rstrip('/').lower(), url)
+        else:
+            print(f"Skipping invalid URL: {url}")
+
+    # Fetch every URL of the pass concurrently, MAX_PAGES tabs at a time
+    await asyncio.gather(*(process_url(browser, semaphore, url) for url in valid_urls.values()))
+    return len(valid_urls)
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 asyncio.run(main())
@@ -1,18 +1,28 @@
 import os
 import time
 import json
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+from lxml import etree, html as lxml_html
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 import urllib3
 from urllib3.exceptions import ProtocolError
 import ssl
+import httplib2
 from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials  # Correct import for OAuth2 credentials
 
 # Request with retries
@@ -31,11 +41,6 @@ def make_request_with_retries(url, retries=3, backoff_factor=1):
             time.sleep(sleep_time)
     raise Exception(f"Failed to fetch {url} after {retries} attempts.")
 
-# Example usage:
-url = 'https://www.leepa.org/Search/PropertySearch.aspx'
-response = make_request_with_retries(url)
-print(response.data)
-
 # Disable SSL verification temporarily (use only for testing)
 os.environ['NO_PROXY'] = 'localhost,127.0.0.1'
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -52,6 +57,52 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CREDENTIALS_PATH = os.path.join(BASE_DIR, "credentials.json")
 TOKEN_PATH = os.path.join(BASE_DIR, "token.json")
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+BATCH_ROWS = 25  # Rows of queued cell writes per batchUpdate flush
+SHEETS_RETRIES = 5  # Retries (randomized exponential backoff) on 429/5xx from Sheets
+MAX_WORKERS = 4  # Parallel headless Firefox drivers
+SEARCH_URL = 'https://www.leepa.org/Search/PropertySearch.aspx'
+
+# Locators (IDs and CSS selectors instead of absolute XPaths)
+STRAP_INPUT = (By.ID, "ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_STRAPTextBox")
+ISSUES_PANEL = (By.ID, "ctl00_BodyContentPlaceHolder_pnlIssues")
+WARNING_BUTTON = (By.ID, "ctl00_BodyContentPlaceHolder_btnWarning")
+RESULT_LINK = (By.CSS_SELECTOR, "#ctl00_BodyContentPlaceHolder_WebTab1 > div > div:nth-of-type(1) > div:nth-of-type(1) > table > tbody > tr > td:nth-of-type(4) > div > div:nth-of-type(1) > a")
+OWNER_PANEL = (By.ID, "divDisplayParcelOwner")  # ":scope" selectors are looked up under this
+OWNERSHIP_TOGGLE = (By.CSS_SELECTOR, ":scope > div:nth-of-type(1) > div > div:nth-of-type(1) > a:nth-of-type(2) > img")
+VALUES_TAB = (By.ID, "ValuesHyperLink")
+PROPERTY_VALUE = (By.CSS_SELECTOR, "#valueGrid > tbody > tr:nth-of-type(2) > td:nth-of-type(4)")
+
+# Output column -> CSS selector for each scraped field
+FIELD_SELECTORS = {
+    "C": "#ownershipDiv > div > ul",
+    "D": ":scope > div:nth-of-type(1) > div > div:nth-of-type(2) > div",
+    "E": PROPERTY_VALUE[1],
+    "F": ":scope > div:nth-of-type(3) > table:nth-of-type(1) > tbody > tr:nth-of-type(3) > td",
+    "S": ":scope > div:nth-of-type(2) > div:nth-of-type(3)",
+}
+
+# Read every field in one WebDriver round-trip (arguments: selectors, owner panel)
+EXTRACT_FIELDS_JS = """
+const [selectors, panel] = arguments;
+const out = {};
+for (const [col, sel] of Object.entries(selectors)) {
+    const el = (sel.startsWith(':scope') ? panel : document).querySelector(sel);
+    out[col] = el ? el.innerText.trim() : '';
+}
+return out;
+"""
+
+# The parcel page is server-rendered; these XPaths read it without a browser
+HTTP_FIELD_XPATHS = {
+    "C": '//*[@id="ownershipDiv"]/div/ul',
+    "D": '//*[@id="divDisplayParcelOwner"]/div[1]/div/div[2]/div',
+    "E": '//*[@id="valueGrid"]//tr[2]/td[4]',
+    "F": '//*[@id="divDisplayParcelOwner"]/div[3]/table[1]//tr[3]/td',
+    "S": '//*[@id="divDisplayParcelOwner"]/div[2]/div[3]',
+}
+
+_http_local = threading.local()
+logger = logging.getLogger(__name__)
 
 # Authenticate with Google Sheets API
 def authenticate_google_sheets():
@@ -72,7 +123,134 @@ def authenticate_google_sheets():
     with open(TOKEN_PATH, "w") as token:
         token.write(creds.to_json())
 
-    return build("sheets", "v4", credentials=creds)
+    # Keep one pooled HTTPS connection to sheets.googleapis.com for all calls
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+    return build("sheets", "v4", http=http, cache_discovery=False)
+
+# Flush queued cell writes to Google Sheets
+def flush_updates(sheets_service, pending):
+    """Send all queued ranges in a single values().batchUpdate request."""
+    if not pending:
+        return
+    sheets_service.spreadsheets().values().batchUpdate(
+        spreadsheetId=SHEET_ID,
+        body={"valueInputOption": "RAW", "data": pending}
+    ).execute(num_retries=SHEETS_RETRIES)
+    pending.clear()
+
+# Setup Firefox driver with headless option
+def create_driver():
+    options = webdriver.FirefoxOptions()
+    options.add_argument("--headless")
+    options.page_load_strategy = "eager"  # Return on DOMContentLoaded; explicit waits cover the rest
+    # Pages are scraped, not viewed: skip images, notifications and autoplay
+    options.set_preference("permissions.default.image", 2)
+    options.set_preference("dom.webnotifications.enabled", False)
+    options.set_preference("media.autoplay.default", 5)
+    service = Service()  # Selenium WebDriver service (for Firefox)
+    return webdriver.Firefox(service=service, options=options)
+
+# One pooled requests session per worker thread
+def get_http_session():
+    session = getattr(_http_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        retries = urllib3.util.Retry(total=3, backoff_factor=1, status_forcelist=(500, 502, 503, 504))
+        session.mount("https://", HTTPAdapter(max_retries=retries))
+        _http_local.session = session
+    return session
+
+# Fetch the parcel page over plain HTTP and parse the fields with lxml
+def fetch_parcel_fields(driver, href):
+    """Return {column: text} for the parcel page, or None if any field is missing or empty."""
+    session = get_http_session()
+    session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+    session.cookies.clear()
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"))
+
+    response = session.get(href, timeout=30)
+    response.raise_for_status()
+    tree = lxml_html.fromstring(response.content)
+
+    fields = {}
+    for col, xpath in HTTP_FIELD_XPATHS.items():
+        nodes = tree.xpath(xpath)
+        if not nodes:
+            return None
+        text = "\n".join(t.strip() for t in nodes[0].itertext() if t.strip())
+        if not text:
+            # Ownership and values only render after the toggle/tab clicks; let the browser fill them
+            return None
+        fields[col] = text
+    return fields
+
+# Scrape a single owner and return the cell writes for its row
+def process_row(i, owner, driver):
+    """Scrape one owner with the given driver and return its queued ranges."""
+    updates = []
+    started = time.perf_counter()
+    print(f"Processing Name: {owner}")
+
+    try:
+        driver.get(SEARCH_URL)
+
+        # Enter owner name and submit
+        strap_input = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+            EC.presence_of_element_located(STRAP_INPUT)
+        )
+        strap_input.send_keys(owner, Keys.RETURN)
+
+        try:
+            # Handle warning pop-up
+            WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                EC.presence_of_element_located(ISSUES_PANEL)
+            )
+            warning_button = driver.find_element(*WARNING_BUTTON)
+            warning_button.click()
+        except (TimeoutException, NoSuchElementException):
+            print("No pop-up found, continuing to next step.")
+
+        # Navigate to property details
+        href = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+            EC.presence_of_element_located(RESULT_LINK)
+        ).get_attribute('href')
+
+        # Try the parcel page over plain HTTP first; render it only if that comes back incomplete
+        try:
+            fields = fetch_parcel_fields(driver, href)
+        except (requests.RequestException, etree.ParserError, etree.XMLSyntaxError, WebDriverException) as e:
+            print(f"HTTP fetch failed for row {i}, falling back to browser: {e}")
+            fields = None
+
+        if fields is None:
+            driver.get(href)
+
+            # Locate the owner panel once; scoped lookups below run under it
+            owner_panel = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                EC.presence_of_element_located(OWNER_PANEL)
+            )
+
+            # Click image to reveal ownership details
+            img_element = owner_panel.find_element(*OWNERSHIP_TOGGLE)
+            img_element.click()
+
+            # Click Value tab and wait for the property value
+            driver.find_element(*VALUES_TAB).click()
+            WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                EC.presence_of_element_located(PROPERTY_VALUE)
+            )
+
+            fields = driver.execute_script(EXTRACT_FIELDS_JS, FIELD_SELECTORS, owner_panel)
+
+        for col, value in fields.items():
+            updates.append({"range": f"{SHEET_NAME}!{col}{i}", "values": [[value]]})
+
+    except Exception as e:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.warning("row=%d elapsed_ms=%.0f error=%s: %s", i, elapsed_ms, type(e).__name__, e)
+
+    return updates
 
 # Correcting the function
 def fetch_data_and_update_sheet():
@@ -83,114 +261,80 @@ def fetch_data_and_update_sheet():
 
         # Define the range for the data
         range_ = f"{SHEET_NAME}!A5001:A8000"
-        result = sheet.values().get(spreadsheetId=SHEET_ID, range=range_).execute()
-        sheet_data = result.get("values", [])
-        print(f"Fetched data: {sheet_data}")  # Debug print to check the data
+        range_done = f"{SHEET_NAME}!C5001:C8000"  # Filled C means the row was already scraped
+        result = sheet.values().batchGet(spreadsheetId=SHEET_ID, ranges=[range_, range_done]).execute(num_retries=SHEETS_RETRIES)
+        value_ranges = result.get("valueRanges", [])
+        sheet_data = value_ranges[0].get("values", []) if len(value_ranges) > 0 else []
+        done_data = value_ranges[1].get("values", []) if len(value_ranges) > 1 else []
+        done_rows = {i for i, r in enumerate(done_data, start=5001) if r and r[0].strip()}
+        print(f"Fetched {len(sheet_data)} rows, {len(done_rows)} already filled")
     except Exception as e:
         print(f"Error fetching data from Google Sheets: {e}")
         return  # Exit if there's an issue fetching the sheet data
 
-    # Web scraping and updating data in Google Sheets
-    url = 'https://www.leepa.org/Search/PropertySearch.aspx'
-
-    for i, row in enumerate(sheet_data, start=5001):
-        owner = row[0] if row else None
-        if not owner or owner.strip() == '':
-            print(f"Skipping empty or blank cell at row {i}")
-            continue
-
-        print(f"Processing Name: {owner}")
-
-        # Setup Firefox driver with headless option
-        options = webdriver.FirefoxOptions()
-        options.add_argument("--headless")
-        service = Service()  # Selenium WebDriver service (for Firefox)
-        driver = webdriver.Firefox(service=service, options=options)
+    # Web scraping and updating data in Google Sheets, one driver per worker
+    drivers = queue.Queue()
+    for _ in range(MAX_WORKERS):
+        drivers.put(create_driver())
 
+    def worker(i, owner):
+        driver = drivers.get()
         try:
-            driver.get(url)
+            if driver is None:
+                driver = create_driver()  # This slot's browser died earlier; relaunch it
+            return process_row(i, owner, driver)
+        finally:
+            # Reset session state before the next owner; a browser that can't be reset has died
+            if driver is not None:
+                try:
+                    driver.delete_all_cookies()
+                except WebDriverException as e:
+                    logger.warning("row=%d dropping dead driver: %s", i, e)
+                    try:
+                        driver.quit()
+                    except WebDriverException:
+                        pass
+                    driver = None
+            drivers.put(driver)
 
-            # Enter owner name and submit
-            strap_input = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.ID, "ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_STRAPTextBox"))
-            )
-            strap_input.send_keys(owner, Keys.RETURN)
-
-            try:
-                # Handle warning pop-up
-                WebDriverWait(driver, 60).until(
-                    EC.presence_of_element_located((By.ID, "ctl00_BodyContentPlaceHolder_pnlIssues"))
-                )
-                warning_button = driver.find_element(By.ID, "ctl00_BodyContentPlaceHolder_btnWarning")
-                warning_button.click()
-            except:
-                print("No pop-up found, continuing to next step.")
-
-            time.sleep(1)
-
-            # Navigate to property details
-            href = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="ctl00_BodyContentPlaceHolder_WebTab1"]/div/div[1]/div[1]/table/tbody/tr/td[4]/div/div[1]/a'))
-            ).get_attribute('href')
-            driver.get(href)
+    pending = []  # Cell writes queued for the next batchUpdate
+    rows_since_flush = 0
 
-            time.sleep(1)
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {}  # future -> sheet row
+            for i, row in enumerate(sheet_data, start=5001):
+                owner = row[0] if row else None
+                if not owner or owner.strip() == '':
+                    print(f"Skipping empty or blank cell at row {i}")
+                    continue
 
-            # Click image to reveal ownership details
-            img_element = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[1]/div/div[1]/a[2]/img'))
-            )
-            img_element.click()
+                if i in done_rows:
+                    print(f"Skipping row {i} (C already filled)")
+                    continue
 
-            ownership_text = driver.find_element(By.XPATH, '//*[@id="ownershipDiv"]/div/ul').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!C{i}",
-                valueInputOption="RAW",
-                body={"values": [[ownership_text]]}
-            ).execute()
-
-            additional_text = driver.find_element(By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[1]/div/div[2]/div').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!D{i}",
-                valueInputOption="RAW",
-                body={"values": [[additional_text]]}
-            ).execute()
-
-            # Click Value tab and extract property value
-            value_tab = driver.find_element(By.ID, "ValuesHyperLink").click()
-            property_value = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="valueGrid"]/tbody/tr[2]/td[4]'))
-            ).text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!E{i}",
-                valueInputOption="RAW",
-                body={"values": [[property_value]]}
-            ).execute()
-
-            building_info = driver.find_element(By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[3]/table[1]/tbody/tr[3]/td').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!F{i}",
-                valueInputOption="RAW",
-                body={"values": [[building_info]]}
-            ).execute()
-
-            full_site = driver.find_element(By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[2]/div[3]').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!S{i}",
-                valueInputOption="RAW",
-                body={"values": [[full_site]]}
-            ).execute()
-
-        except Exception as e:
-            print(f"Error processing row {i}: {e}")
+                futures[executor.submit(worker, i, owner)] = i
 
-        finally:
-            driver.quit()
+            # Sheets writes stay on this thread; flush every BATCH_ROWS finished rows
+            for future in as_completed(futures):
+                try:
+                    pending.extend(future.result())
+                except Exception as e:
+                    # One failed row (e.g. a browser that couldn't be relaunched) must not abort the run
+                    logger.warning("row=%d worker failed: %s: %s", futures[future], type(e).__name__, e)
+                    continue
+                rows_since_flush += 1
+                if rows_since_flush >= BATCH_ROWS:
+                    flush_updates(sheets_service, pending)
+                    rows_since_flush = 0
+    finally:
+        # Write whatever is still queued
+        flush_updates(sheets_service, pending)
+        while not drivers.empty():
+            driver = drivers.get()
+            if driver is not None:
+                driver.quit()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
     fetch_data_and_update_sheet()
@@ -7,12 +7,15 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 import urllib3
 from urllib3.exceptions import ProtocolError
 import ssl
+import httplib2
 from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials  # Correct import for OAuth2 credentials
 
 # Request with retries
@@ -31,11 +34,6 @@ def make_request_with_retries(url, retries=3, backoff_factor=1):
             time.sleep(sleep_time)
     raise Exception(f"Failed to fetch {url} after {retries} attempts.")
 
-# Example usage:
-url = 'https://www.leepa.org/Search/PropertySearch.aspx'
-response = make_request_with_retries(url)
-print(response.data)
-
 # Disable SSL verification temporarily (use only for testing)
 os.environ['NO_PROXY'] = 'localhost,127.0.0.1'
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -52,6 +50,28 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CREDENTIALS_PATH = os.path.join(BASE_DIR, "credentials.json")
 TOKEN_PATH = os.path.join(BASE_DIR, "token.json")
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+BATCH_ROWS = 25  # Rows of queued cell writes per batchUpdate flush
+SHEETS_RETRIES = 5  # Retries (randomized exponential backoff) on 429/5xx from Sheets
+
+# Output column -> CSS selector for each scraped field on the parcel page
+FIELD_SELECTORS = {
+    "C": "#ownershipDiv > div > ul",
+    "D": "#divDisplayParcelOwner > div:nth-of-type(1) > div > div:nth-of-type(2) > div",
+    "E": "#valueGrid > tbody > tr:nth-of-type(2) > td:nth-of-type(4)",
+    "F": "#divDisplayParcelOwner > div:nth-of-type(3) > table:nth-of-type(1) > tbody > tr:nth-of-type(3) > td",
+    "S": "#divDisplayParcelOwner > div:nth-of-type(2) > div:nth-of-type(3)",
+}
+
+# Read the given fields in one WebDriver round-trip (arguments: selectors); missing elements come back as None
+EXTRACT_FIELDS_JS = """
+const selectors = arguments[0];
+const out = {};
+for (const [col, sel] of Object.entries(selectors)) {
+    const el = document.querySelector(sel);
+    out[col] = el ? el.innerText.trim() : null;
+}
+return out;
+"""
 
 # Authenticate with Google Sheets API
 def authenticate_google_sheets():
@@ -72,7 +92,27 @@ def authenticate_google_sheets():
     with open(TOKEN_PATH, "w") as token:
         token.write(creds.to_json())
 
-    return build("sheets", "v4", credentials=creds)
+    # Keep one pooled HTTPS connection to sheets.googleapis.com for all calls
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+    return build("sheets", "v4", http=http, cache_discovery=False)
+
+# Flush queued cell writes to Google Sheets
+def flush_updates(sheets_service, pending):
+    """Send all queued ranges in a single values().batchUpdate request."""
+    if not pending:
+        return
+    sheets_service.spreadsheets().values().batchUpdate(
+        spreadsheetId=SHEET_ID,
+        body={"valueInputOption": "RAW", "data": pending}
+    ).execute(num_retries=SHEETS_RETRIES)
+    pending.clear()
+
+# Setup Firefox driver with headless option
+def create_driver():
+    options = webdriver.FirefoxOptions()
+    options.add_argument("--headless")
+    service = Service()  # Selenium WebDriver service (for Firefox)
+    return webdriver.Firefox(service=service, options=options)
 
 # Correcting the function
 def fetch_data_and_update_sheet():
@@ -83,114 +123,114 @@ def fetch_data_and_update_sheet():
 
         # Define the range for the data
         range_ = f"{SHEET_NAME}!A10001:A15000"
-        result = sheet.values().get(spreadsheetId=SHEET_ID, range=range_).execute()
-        sheet_data = result.get("values", [])
-        print(f"Fetched data: {sheet_data}")  # Debug print to check the data
+        range_done = f"{SHEET_NAME}!C10001:C15000"  # Filled C means the row was already scraped
+        result = sheet.values().batchGet(spreadsheetId=SHEET_ID, ranges=[range_, range_done]).execute(num_retries=SHEETS_RETRIES)
+        value_ranges = result.get("valueRanges", [])
+        sheet_data = value_ranges[0].get("values", []) if len(value_ranges) > 0 else []
+        done_data = value_ranges[1].get("values", []) if len(value_ranges) > 1 else []
+        done_rows = {i for i, r in enumerate(done_data, start=10001) if r and r[0].strip()}
+        print(f"Fetched {len(sheet_data)} rows, {len(done_rows)} already filled")
     except Exception as e:
         print(f"Error fetching data from Google Sheets: {e}")
         return  # Exit if there's an issue fetching the sheet data
 
     # Web scraping and updating data in Google Sheets
     url = 'https://www.leepa.org/Search/PropertySearch.aspx'
+    pending = []  # Cell writes queued for the next batchUpdate
+    rows_since_flush = 0
 
-    for i, row in enumerate(sheet_data, start=10001):
-        owner = row[0] if row else None
-        if not owner or owner.strip() == '':
-            print(f"Skipping empty or blank cell at row {i}")
-            continue
-
-        print(f"Processing Name: {owner}")
+    # One headless Firefox is reused for every row; it is relaunched only if it dies
+    driver = create_driver()
 
-        # Setup Firefox driver with headless option
-        options = webdriver.FirefoxOptions()
-        options.add_argument("--headless")
-        service = Service()  # Selenium WebDriver service (for Firefox)
-        driver = webdriver.Firefox(service=service, options=options)
+    try:
+        for i, row in enumerate(sheet_data, start=10001):
+            owner = row[0] if row else None
+            if not owner or owner.strip() == '':
+                print(f"Skipping empty or blank cell at row {i}")
+                continue
 
-        try:
-            driver.get(url)
+            if i in done_rows:
+                print(f"Skipping row {i} (C already filled)")
+                continue
 
-            # Enter owner name and submit
-            strap_input = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.ID, "ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_STRAPTextBox"))
-            )
-            strap_input.send_keys(owner, Keys.RETURN)
+            print(f"Processing Name: {owner}")
+            fields = {}  # Filled in as each part of the page is read
 
             try:
-                # Handle warning pop-up
-                WebDriverWait(driver, 60).until(
-                    EC.presence_of_element_located((By.ID, "ctl00_BodyContentPlaceHolder_pnlIssues"))
+                driver.get(url)
+
+                # Enter owner name and submit
+                strap_input = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                    EC.presence_of_element_located((By.ID, "ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_STRAPTextBox"))
+                )
+                strap_input.send_keys(owner, Keys.RETURN)
+
+                try:
+                    # Handle warning pop-up
+                    WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                        EC.presence_of_element_located((By.ID, "ctl00_BodyContentPlaceHolder_pnlIssues"))
+                    )
+                    warning_button = driver.find_element(By.ID, "ctl00_BodyContentPlaceHolder_btnWarning")
+                    warning_button.click()
+                except:
+                    print("No pop-up found, continuing to next step.")
+
+                # Navigate to property details (waits only until the result link appears)
+                href = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                    EC.presence_of_element_located((By.XPATH, '//*[@id="ctl00_BodyContentPlaceHolder_WebTab1"]/div/div[1]/div[1]/table/tbody/tr/td[4]/div/div[1]/a'))
+                ).get_attribute('href')
+                driver.get(href)
+
+                # Click image to reveal ownership details
+                img_element = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                    EC.presence_of_element_located((By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[1]/div/div[1]/a[2]/img'))
                 )
-                warning_button = driver.find_element(By.ID, "ctl00_BodyContentPlaceHolder_btnWarning")
-                warning_button.click()
-            except:
-                print("No pop-up found, continuing to next step.")
-
-            time.sleep(7)
-
-            # Navigate to property details
-            href = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="ctl00_BodyContentPlaceHolder_WebTab1"]/div/div[1]/div[1]/table/tbody/tr/td[4]/div/div[1]/a'))
-            ).get_attribute('href')
-            driver.get(href)
-
-            time.sleep(5)
-
-            # Click image to reveal ownership details
-            img_element = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[1]/div/div[1]/a[2]/img'))
-            )
-            img_element.click()
-
-            ownership_text = driver.find_element(By.XPATH, '//*[@id="ownershipDiv"]/div/ul').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!C{i}",
-                valueInputOption="RAW",
-                body={"values": [[ownership_text]]}
-            ).execute()
-
-            additional_text = driver.find_element(By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[1]/div/div[2]/div').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!D{i}",
-                valueInputOption="RAW",
-                body={"values": [[additional_text]]}
-            ).execute()
-
-            # Click Value tab and extract property value
-            value_tab = driver.find_element(By.ID, "ValuesHyperLink").click()
-            property_value = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="valueGrid"]/tbody/tr[2]/td[4]'))
-            ).text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!E{i}",
-                valueInputOption="RAW",
-                body={"values": [[property_value]]}
-            ).execute()
-
-            building_info = driver.find_element(By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[3]/table[1]/tbody/tr[3]/td').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!F{i}",
-                valueInputOption="RAW",
-                body={"values": [[building_info]]}
-            ).execute()
-
-            full_site = driver.find_element(By.XPATH, '//*[@id="divDisplayParcelOwner"]/div[2]/div[3]').text
-            sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!S{i}",
-                valueInputOption="RAW",
-                body={"values": [[full_site]]}
-            ).execute()
-
-        except Exception as e:
-            print(f"Error processing row {i}: {e}")
-
-        finally:
+                img_element.click()
+
+                # Read the ownership fields now so they are still written if the Values tab fails
+                fields.update(driver.execute_script(EXTRACT_FIELDS_JS, {col: FIELD_SELECTORS[col] for col in "CD"}))
+
+                # Click Value tab and wait for the property value
+                driver.find_element(By.ID, "ValuesHyperLink").click()
+                WebDriverWait(driver, 15, poll_frequency=1.0).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, FIELD_SELECTORS["E"]))
+                )
+
+                # Read the remaining fields in one round-trip
+                fields.update(driver.execute_script(EXTRACT_FIELDS_JS, {col: sel for col, sel in FIELD_SELECTORS.items() if col not in fields}))
+
+            except Exception as e:
+                print(f"Error processing row {i}: {e}")
+
+            finally:
+                # Clear cookies between owners; a browser that can't be reset has died, so relaunch it
+                try:
+                    driver.delete_all_cookies()
+                except WebDriverException as e:
+                    print(f"Browser lost at row {i}, relaunching: {e}")
+                    try:
+                        driver.quit()
+                    except WebDriverException:
+                        pass
+                    driver = create_driver()
+
+            # Queue whatever was read as two ranges (C:F are adjacent, S stands alone); None leaves a cell untouched
+            if any(value is not None for value in fields.values()):
+                pending.append({"range": f"{SHEET_NAME}!C{i}:F{i}", "values": [[fields.get(col) for col in "CDEF"]]})
+                if fields.get("S") is not None:
+                    pending.append({"range": f"{SHEET_NAME}!S{i}", "values": [[fields["S"]]]})
+
+            rows_since_flush += 1
+            if rows_since_flush >= BATCH_ROWS:
+                flush_updates(sheets_service, pending)
+                rows_since_flush = 0
+    finally:
+        # Write whatever is still queued
+        flush_updates(sheets_service, pending)
+        try:
             driver.quit()
+        except WebDriverException:
+            pass  # Already gone (a relaunch failed mid-run)
 
 if __name__ == "__main__":
     fetch_data_and_update_sheet()
@@ -1,4 +1,8 @@
 import os
+import functools
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium import webdriver
 from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.common.by import By
@@ -6,10 +10,12 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from google.oauth2.credentials import Credentials
+import httplib2
 from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
 
 # Google Sheets setup
 SHEET_ID = '1VUB2NdGSY0l3tuQAfkz8QV2XZpOj2khCB69r5zU1E5A'
@@ -20,8 +26,36 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CREDENTIALS_PATH = os.path.join(BASE_DIR, "credentials.json")
 TOKEN_PATH = os.path.join(BASE_DIR, "token.json")
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
-
-# Authenticate with Google Sheets API
+BATCH_ROWS = 25  # Flush queued writes after this many rows...
+SHEETS_RETRIES = 5  # Retries (randomized exponential backoff) on 429/5xx from Sheets
+FLUSH_SECONDS = 5  # ...or once this many seconds have passed since the last flush
+MAX_WORKERS = 4  # Browsers scraping rows in parallel
+
+# Locators (IDs and CSS selectors instead of absolute XPaths)
+SEARCH_INPUT = (By.CSS_SELECTOR, "#txtPropertySearch_Pid")
+OWNER_NAME = (By.CSS_SELECTOR, "#cssDetails_Top_Outer > div:nth-of-type(2) > div > div:nth-of-type(1) > div:nth-of-type(2) > div:nth-of-type(1)")
+LAST_SALE_PRICE = (By.CSS_SELECTOR, "#tSalesTransfers > tbody > tr:nth-of-type(1) > td:nth-of-type(2)")
+
+# Output column -> CSS selector for each scraped field (adjacent, in order: written as one C:F range)
+FIELD_SELECTORS = {
+    "C": OWNER_NAME[1],
+    "D": "#cssDetails_Top_Outer > div:nth-of-type(2) > div > div:nth-of-type(2) > div:nth-of-type(2) > div",
+    "E": LAST_SALE_PRICE[1],
+    "F": "#cssDetails_Top_Outer > div:nth-of-type(2) > div > div:nth-of-type(7) > div:nth-of-type(2)",
+}
+
+# Read every field in one WebDriver round-trip; missing elements come back as None
+EXTRACT_FIELDS_JS = """
+const out = {};
+for (const [col, sel] of Object.entries(arguments[0])) {
+    const el = document.querySelector(sel);
+    out[col] = el ? el.innerText.trim() : null;
+}
+return out;
+"""
+
+# Authenticate with Google Sheets API (built once and reused for the whole run)
+@functools.lru_cache(maxsize=1)
 def authenticate_google_sheets():
     creds = None
     if os.path.exists(TOKEN_PATH):
@@ -34,54 +68,92 @@ def authenticate_google_sheets():
             creds = flow.run_local_server(port=0)
         with open(TOKEN_PATH, "w") as token:
             token.write(creds.to_json())
-    return build("sheets", "v4", credentials=creds)
+    # Keep one pooled HTTPS connection to sheets.googleapis.com for all calls
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+    return build("sheets", "v4", http=http, cache_discovery=False)
+
+# Flush queued cell writes to Google Sheets in one request
+def flush_updates(sheet, pending):
+    if not pending:
+        return
+    sheet.values().batchUpdate(
+        spreadsheetId=SHEET_ID,
+        body={"valueInputOption": "RAW", "data": pending}
+    ).execute(num_retries=SHEETS_RETRIES)
+    pending.clear()
+
+# Start a headless Firefox driver
+def create_driver():
+    options = webdriver.FirefoxOptions()
+    options.add_argument("--headless")
+    # Pages are scraped, not viewed: skip images, web fonts, notifications and autoplay
+    options.set_preference("permissions.default.image", 2)
+    options.set_preference("browser.display.use_document_fonts", 0)
+    options.set_preference("dom.webnotifications.enabled", False)
+    options.set_preference("media.autoplay.default", 5)
+    options.set_preference("media.volume_scale", "0.0")
+    # No background safebrowsing or telemetry traffic competing with page loads
+    options.set_preference("browser.safebrowsing.malware.enabled", False)
+    options.set_preference("browser.safebrowsing.phishing.enabled", False)
+    options.set_preference("datareporting.healthreport.uploadEnabled", False)
+    options.set_preference("toolkit.telemetry.enabled", False)
+    # Every lookup loads the same SPA bundle, so keep it in a large disk cache
+    options.set_preference("browser.cache.disk.enable", True)
+    options.set_preference("browser.cache.disk.capacity", 512000)
+    return webdriver.Firefox(service=Service(), options=options)
+
+# Check whether a driver's browser still answers; a crashed Firefox raises WebDriverException
+def driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+# Quit a driver, ignoring one whose browser has already died
+def quit_driver(driver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
 
-# Function to process a single row
-def process_row(driver, sheet_service, site, i):
+# Function to process a single row; returns the cell writes for it
+def process_row(driver, site, i):
+    updates = []
     try:
         # Navigate to the site
         driver.get('https://www.bcpao.us/propertysearch/#/nav/Search')
 
         # Input the Site ID and search
-        site_input = WebDriverWait(driver, 60).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, '#txtPropertySearch_Pid'))
+        site_input = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+            EC.element_to_be_clickable(SEARCH_INPUT)
         )
         site_input.send_keys(site, Keys.RETURN)
 
-        WebDriverWait(driver, 60).until(
-            EC.presence_of_element_located((By.XPATH, '//*[@id="cssDetails_Top_Outer"]/div[2]/div/div[1]/div[2]/div[1]'))
+        WebDriverWait(driver, 15, poll_frequency=1.0).until(
+            EC.presence_of_element_located(OWNER_NAME)
         )
         print("✅ Result loaded")
+        WebDriverWait(driver, 15, poll_frequency=1.0).until(
+            EC.presence_of_element_located(LAST_SALE_PRICE)
+        )
 
         # Extract Data
-        ownership_text = driver.find_element(By.XPATH, '//*[@id="cssDetails_Top_Outer"]/div[2]/div/div[1]/div[2]/div[1]').text
-        additional_text = driver.find_element(By.XPATH, '//*[@id="cssDetails_Top_Outer"]/div[2]/div/div[2]/div[2]/div').text
-        property_value = WebDriverWait(driver, 60).until(
-            EC.presence_of_element_located((By.XPATH, '//*[@id="tSalesTransfers"]/tbody/tr[1]/td[2]'))
-        ).text
-        building_info = driver.find_element(By.XPATH, '//*[@id="cssDetails_Top_Outer"]/div[2]/div/div[7]/div[2]').text
-
-        # Update Google Sheet
-        updates = [
-            (f"{SHEET_NAME}!C{i}", [[ownership_text]]),
-            (f"{SHEET_NAME}!D{i}", [[additional_text]]),
-            (f"{SHEET_NAME}!E{i}", [[property_value]]),
-            (f"{SHEET_NAME}!F{i}", [[building_info]])
-        ]
-
-        for rng, val in updates:
-            sheet_service.values().update(
-                spreadsheetId=SHEET_ID,
-                range=rng,
-                valueInputOption="RAW",
-                body={"values": val}
-            ).execute()
+        fields = driver.execute_script(EXTRACT_FIELDS_JS, FIELD_SELECTORS)
+        missing = [col for col, value in fields.items() if value is None]
+        if missing:
+            raise NoSuchElementException(f"No element for column(s) {', '.join(missing)}")
+
+        # Queue the row's cells for the next batchUpdate
+        updates.append({"range": f"{SHEET_NAME}!C{i}:F{i}", "values": [[fields[col] for col in FIELD_SELECTORS]]})
 
         print(f"✅ Row {i} processed.")
 
     except Exception as e:
         print(f"❌ Error processing row {i}: {e}")
 
+    return updates
+
 # Main function
 def fetch_data_and_update_sheet():
     # Authenticate once
@@ -91,38 +163,75 @@ def fetch_data_and_update_sheet():
     # Fetch site data and check column G (skip rows where G is filled)
     range_sites = f"{SHEET_NAME}!A2:A"
     range_checks = f"{SHEET_NAME}!G2:G"
-    site_data = sheet.values().get(spreadsheetId=SHEET_ID, range=range_sites).execute().get("values", [])
-    check_data = sheet.values().get(spreadsheetId=SHEET_ID, range=range_checks).execute().get("values", [])
-
-    # Pad check_data to match site_data
-    while len(check_data) < len(site_data):
-        check_data.append([])
-
-    # Start the browser only once
-    options = webdriver.FirefoxOptions()
-    options.add_argument("--headless")
-    driver = webdriver.Firefox(service=Service(), options=options)
+    result = sheet.values().batchGet(spreadsheetId=SHEET_ID, ranges=[range_sites, range_checks]).execute(num_retries=SHEETS_RETRIES)
+    value_ranges = result.get("valueRanges", [])
+    site_data = value_ranges[0].get("values", []) if len(value_ranges) > 0 else []
+    check_data = value_ranges[1].get("values", []) if len(value_ranges) > 1 else []
+
+    # Rows whose G cell is already filled, and the non-empty sites to scrape
+    skip_rows = {i for i, r in enumerate(check_data, start=2) if r and r[0].strip()}
+    sites = {i: r[0].strip() for i, r in enumerate(site_data, start=2) if r and r[0].strip()}
+    print(f"🔎 {len(sites)} sites found, {len(skip_rows)} rows already filled in G.")
+
+    # Start one browser per worker and hand them out through a queue
+    drivers = queue.Queue()
+
+    def worker(site, i):
+        driver = drivers.get()
+        try:
+            # Relaunch this worker's browser if it died on an earlier row
+            if driver is None:
+                driver = create_driver()
+            updates = process_row(driver, site, i)
+
+            # process_row swallows errors, so make sure the browser still answers before reusing it
+            if not driver_alive(driver):
+                print(f"❌ Browser lost at row {i}, relaunching it for the next row.")
+                quit_driver(driver)
+                driver = None
+            return updates
+        finally:
+            drivers.put(driver)
+
+    pending = []  # Cell writes queued for the next batchUpdate
+    rows_since_flush = 0
+    last_flush = time.monotonic()
 
     try:
-        for i, (site_row, check_row) in enumerate(zip(site_data, check_data), start=2):
-            site = site_row[0].strip() if site_row else None
-            check_value = check_row[0].strip() if check_row else ""
-
-            print(f"🔎 Row {i}: Site = {site}, G = '{check_value}'")
-
-            if not site:
-                print(f"⚠️ Skipping row {i} (empty site).")
-                continue
-
-            if check_value:
-                print(f"⏭️ Skipping row {i} (G not empty).")
-                continue
-
-            process_row(driver, sheets_service, site, i)
+        # Launched inside the try so browsers already started are closed if a later launch fails
+        for _ in range(MAX_WORKERS):
+            drivers.put(create_driver())
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {}  # future -> sheet row
+            for i, site in sites.items():
+                if i in skip_rows:
+                    continue
+
+                futures[executor.submit(worker, site, i)] = i
+
+            # Sheets writes stay on this thread
+            for future in as_completed(futures):
+                try:
+                    pending.extend(future.result())
+                except Exception as e:
+                    # A worker that failed outright (e.g. a browser relaunch) costs only its own row
+                    print(f"❌ Error processing row {futures[future]}: {e}")
+                    continue
+                rows_since_flush += 1
+                if rows_since_flush >= BATCH_ROWS or time.monotonic() - last_flush >= FLUSH_SECONDS:
+                    flush_updates(sheet, pending)
+                    rows_since_flush = 0
+                    last_flush = time.monotonic()
 
     finally:
-        driver.quit()
-        print("🚪 Browser closed.")
+        # Write whatever is still queued before shutting down
+        flush_updates(sheet, pending)
+        while not drivers.empty():
+            driver = drivers.get()
+            if driver is not None:
+                quit_driver(driver)
+        print("🚪 Browsers closed.")
 
     print("🚀 All applicable rows have been processed.")
 
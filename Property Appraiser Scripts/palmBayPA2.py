@@ -1,4 +1,8 @@
 import os
+import functools
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 from selenium import webdriver
 from selenium.webdriver.firefox.service import Service
@@ -7,10 +11,12 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from google.oauth2.credentials import Credentials
+import httplib2
 from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
 
 # Google Sheets setup
 SHEET_ID = '1VUB2NdGSY0l3tuQAfkz8QV2XZpOj2khCB69r5zU1E5A'
@@ -21,8 +27,37 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CREDENTIALS_PATH = os.path.join(BASE_DIR, "credentials.json")
 TOKEN_PATH = os.path.join(BASE_DIR, "token.json")
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+BATCH_ROWS = 25  # Flush queued writes after this many rows...
+SHEETS_RETRIES = 5  # Retries (randomized exponential backoff) on 429/5xx from Sheets
+FLUSH_SECONDS = 5  # ...or once this many seconds have passed since the last flush
+DRIVER_RESTART_ROWS = 1500  # Relaunch Firefox after this many rows to shed leaked memory
+MAX_WORKERS = 4  # Browsers scraping rows in parallel
 
-# Authenticate with Google Sheets API
+# Locators (IDs and CSS selectors instead of absolute XPaths)
+SEARCH_INPUT = (By.CSS_SELECTOR, "#txtPropertySearch_Pid")
+OWNER_NAME = (By.CSS_SELECTOR, "#cssDetails_Top_Outer > div:nth-of-type(2) > div > div:nth-of-type(1) > div:nth-of-type(2) > div:nth-of-type(1)")
+LAST_SALE_PRICE = (By.CSS_SELECTOR, "#tSalesTransfers > tbody > tr:nth-of-type(1) > td:nth-of-type(2)")
+
+# Output column -> CSS selector for each scraped field (adjacent, in order: written as one C:F range)
+FIELD_SELECTORS = {
+    "C": OWNER_NAME[1],
+    "D": "#cssDetails_Top_Outer > div:nth-of-type(2) > div > div:nth-of-type(2) > div:nth-of-type(2) > div",
+    "E": LAST_SALE_PRICE[1],
+    "F": "#cssDetails_Top_Outer > div:nth-of-type(2) > div > div:nth-of-type(7) > div:nth-of-type(2)",
+}
+
+# Read every field in one WebDriver round-trip; missing elements come back as None
+EXTRACT_FIELDS_JS = """
+const out = {};
+for (const [col, sel] of Object.entries(arguments[0])) {
+    const el = document.querySelector(sel);
+    out[col] = el ? el.innerText.trim() : null;
+}
+return out;
+"""
+
+# Authenticate with Google Sheets API (built once and reused for the whole run)
+@functools.lru_cache(maxsize=1)
 def authenticate_google_sheets():
     creds = None
     if os.path.exists(TOKEN_PATH):
@@ -38,122 +73,96 @@ def authenticate_google_sheets():
     with open(TOKEN_PATH, "w") as token:
         token.write(creds.to_json())
 
-    return build("sheets", "v4", credentials=creds)
+    # Keep one pooled HTTPS connection to sheets.googleapis.com for all calls
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+    return build("sheets", "v4", http=http, cache_discovery=False)
 
-# Function to safely extract text
-def extract_text(driver, xpath, default_value="Not Found"):
-    try:
-        element = WebDriverWait(driver, 60).until(
-            EC.presence_of_element_located((By.XPATH, xpath))
-        )
-        return element.text.strip()
-    except (NoSuchElementException, TimeoutException):
-        return default_value
+# Flush queued cell writes to Google Sheets in one request
+def flush_updates(sheet, pending):
+    if not pending:
+        return
+    sheet.values().batchUpdate(
+        spreadsheetId=SHEET_ID,
+        body={"valueInputOption": "RAW", "data": pending}
+    ).execute(num_retries=SHEETS_RETRIES)
+    pending.clear()
 
-# Correcting the function
-def fetch_data_and_update_sheet():
+# Start a headless Firefox driver
+def create_driver():
+    options = webdriver.FirefoxOptions()
+    options.add_argument("--headless")
+    # Pages are scraped, not viewed: skip images, web fonts, notifications and autoplay
+    options.set_preference("permissions.default.image", 2)
+    options.set_preference("browser.display.use_document_fonts", 0)
+    options.set_preference("dom.webnotifications.enabled", False)
+    options.set_preference("media.autoplay.default", 5)
+    options.set_preference("media.volume_scale", "0.0")
+    # No background safebrowsing or telemetry traffic competing with page loads
+    options.set_preference("browser.safebrowsing.malware.enabled", False)
+    options.set_preference("browser.safebrowsing.phishing.enabled", False)
+    options.set_preference("datareporting.healthreport.uploadEnabled", False)
+    options.set_preference("toolkit.telemetry.enabled", False)
+    # Every lookup loads the same SPA bundle, so keep it in a large disk cache
+    options.set_preference("browser.cache.disk.enable", True)
+    options.set_preference("browser.cache.disk.capacity", 512000)
+    service = Service()
+    return webdriver.Firefox(service=service, options=options)
+
+# Check whether a driver's browser still answers; a crashed Firefox raises WebDriverException
+def driver_alive(driver):
     try:
-        # Authenticate with Google Sheets API
-        sheets_service = authenticate_google_sheets()  # Changed 'service' to 'sheets_service'
-        sheet = sheets_service.spreadsheets()  # This is the correct object to interact with Sheets API
-
-        # Define the range for the data
-        range_ = f"{SHEET_NAME}!A2739:A5474"
-        result = sheet.values().get(spreadsheetId=SHEET_ID, range=range_).execute()
-        sheet_data = result.get("values", [])
-        print(f"Fetched data: {sheet_data}")  # Debug print to check the data
-    except Exception as e:
-        print(f"Error fetching data from Google Sheets: {e}")
-        return  # Exit if there's an issue fetching the sheet data
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
 
-def process_row(site, i, sheet):
-    driver = None  # Initialize the driver variable to None
+# Quit a driver, ignoring one whose browser has already died
+def quit_driver(driver):
     try:
-        # Create a new WebDriver instance
-        options = webdriver.FirefoxOptions()
-        options.add_argument("--headless")
-        service = Service()
-        driver = webdriver.Firefox(service=service, options=options)
+        driver.quit()
+    except WebDriverException:
+        pass
 
+# Scrape one site and return the cell writes for its row
+def process_row(driver, site, i):
+    updates = []
+    try:
         # Navigate to the site
         driver.get('https://www.bcpao.us/propertysearch/#/nav/Search')
 
         # Input the Site and Search
-        site_input = WebDriverWait(driver, 60).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, '#txtPropertySearch_Pid'))
+        site_input = WebDriverWait(driver, 15, poll_frequency=1.0).until(
+            EC.element_to_be_clickable(SEARCH_INPUT)
         )
         site_input.send_keys(site, Keys.RETURN)
 
-        ownership_text = WebDriverWait(driver, 60).until(
-            EC.element_to_be_clickable((By.XPATH, '//*[@id="cssDetails_Top_Outer"]/div[2]/div/div[1]/div[2]/div[1]'))
+        WebDriverWait(driver, 15, poll_frequency=1.0).until(
+            EC.element_to_be_clickable(OWNER_NAME)
         )
         print("result loaded")
     except Exception as e:
-        print(f"Error fetching data from Google Sheets: {e}")
-    
-        
+        print(f"❌ Error loading row {i}: {e}")
+        return updates
 
     try:
-        # Authenticate with Google Sheets API
-        sheets_service = authenticate_google_sheets()  # Changed 'service' to 'sheets_service'
-        sheet = sheets_service.spreadsheets()  # This is the correct object to interact with Sheets API
-
-        # Define the range for the data
-        range_ = f"{SHEET_NAME}!A2739:A5474"
-        result = sheet.values().get(spreadsheetId=SHEET_ID, range=range_).execute()
-        sheet_data = result.get("values", [])
-        print(f"Fetched data: {sheet_data}")  # Debug print to check the data
-    except Exception as e:
-        print(f"Error fetching data from Google Sheets: {e}")
-        return  # Exit if there's an issue fetching the sheet data
+        # Wait for the sales table, then extract every field at once
+        WebDriverWait(driver, 15, poll_frequency=1.0).until(
+            EC.presence_of_element_located(LAST_SALE_PRICE)
+        )
+        fields = driver.execute_script(EXTRACT_FIELDS_JS, FIELD_SELECTORS)
+        missing = [col for col, value in fields.items() if value is None]
+        if missing:
+            raise NoSuchElementException(f"No element for column(s) {', '.join(missing)}")
 
-    try:
-        # Extract Data
-        ownership_text = driver.find_element(By.XPATH, '//*[@id="cssDetails_Top_Outer"]/div[2]/div/div[1]/div[2]/div[1]').text
-        sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!C{i}",
-                valueInputOption="RAW",
-                body={"values": [[ownership_text]]}
-            ).execute()
-
-        additional_text = driver.find_element(By.XPATH, '//*[@id="cssDetails_Top_Outer"]/div[2]/div/div[2]/div[2]/div').text
-        sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!D{i}",
-                valueInputOption="RAW",
-                body={"values": [[additional_text]]}
-            ).execute()
-
-            # Click Value tab and extract property value
-        property_value = WebDriverWait(driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="tSalesTransfers"]/tbody/tr[1]/td[2]'))
-            ).text
-        sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!E{i}",
-                valueInputOption="RAW",
-                body={"values": [[property_value]]}
-            ).execute()
-
-        building_info = driver.find_element(By.XPATH, '//*[@id="cssDetails_Top_Outer"]/div[2]/div/div[7]/div[2]').text
-        sheets_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range=f"{SHEET_NAME}!F{i}",
-                valueInputOption="RAW",
-                body={"values": [[building_info]]}
-            ).execute()
+        # Queue the row's cells for the next batchUpdate
+        updates.append({"range": f"{SHEET_NAME}!C{i}:F{i}", "values": [[fields[col] for col in FIELD_SELECTORS]]})
 
         print(f"✅ Row {i} completed.")
 
     except Exception as e:
         print(f"❌ Error processing row {i}: {e}")
 
-    finally:
-        # Close the browser if it was initialized
-        if driver:
-            driver.quit()
-        print(f"🚪 Closed browser instance for Row {i}\n")
+    return updates
 
 
 # Main data fetching and updating
@@ -161,22 +170,89 @@ def fetch_data_and_update_sheet():
     sheets_service = authenticate_google_sheets()
     sheet = sheets_service.spreadsheets()
 
-    # ✅ Fetch data from Google Sheet
+    # ✅ Fetch sites and column C together (rows whose C is filled were already scraped)
     range_ = f"{SHEET_NAME}!A2739:A5474"
-    result = sheet.values().get(spreadsheetId=SHEET_ID, range=range_).execute()
-    sheet_data = result.get("values", [])
+    range_done = f"{SHEET_NAME}!C2739:C5474"
+    result = sheet.values().batchGet(spreadsheetId=SHEET_ID, ranges=[range_, range_done]).execute(num_retries=SHEETS_RETRIES)
+    value_ranges = result.get("valueRanges", [])
+    sheet_data = value_ranges[0].get("values", []) if len(value_ranges) > 0 else []
+    done_data = value_ranges[1].get("values", []) if len(value_ranges) > 1 else []
+
+    # Pad done_data to match sheet_data
+    while len(done_data) < len(sheet_data):
+        done_data.append([])
+
+    # ✅ Start one browser per worker and hand them out through a queue
+    drivers = queue.Queue()
 
-    # ✅ Process each row with a new browser instance
-    for i, row in enumerate(sheet_data, start=2739):
-        site = row[0].strip() if row else None
-        print(f"Processing Name: {site}")
+    def worker(site, i):
+        slot = drivers.get()
+        try:
+            # ✅ Relaunch this worker's browser if it died, or periodically to keep memory in check
+            if slot[0] is None or slot[1] >= DRIVER_RESTART_ROWS:
+                if slot[0] is not None:
+                    quit_driver(slot[0])
+                    slot[0] = None
+                slot[0] = create_driver()
+                slot[1] = 0
+            slot[1] += 1
+            updates = process_row(slot[0], site, i)
 
-        if not site:
-            print(f"Skipping empty row {i}")
-            continue
+            # ✅ process_row swallows errors, so make sure the browser still answers before reusing it
+            if not driver_alive(slot[0]):
+                print(f"❌ Browser lost at row {i}, relaunching it for the next row.")
+                quit_driver(slot[0])
+                slot[0] = None
+            return updates
+        finally:
+            drivers.put(slot)
+
+    pending = []  # Cell writes queued for the next batchUpdate
+    rows_since_flush = 0
+    last_flush = time.monotonic()
+
+    try:
+        # Launched inside the try so browsers already started are closed if a later launch fails
+        for _ in range(MAX_WORKERS):
+            drivers.put([create_driver(), 0])  # [driver, rows handled since launch]
 
-        # ✅ Process the row with a new browser instance
-        process_row(site, i, sheet)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {}  # future -> sheet row
+            for i, (row, done_row) in enumerate(zip(sheet_data, done_data), start=2739):
+                site = row[0].strip() if row else None
+                print(f"Processing Name: {site}")
+
+                if not site:
+                    print(f"Skipping empty row {i}")
+                    continue
+
+                if done_row and done_row[0].strip():
+                    print(f"⏭️ Skipping row {i} (C already filled).")
+                    continue
+
+                futures[executor.submit(worker, site, i)] = i
+
+            # Sheets writes stay on this thread
+            for future in as_completed(futures):
+                try:
+                    pending.extend(future.result())
+                except Exception as e:
+                    # A worker that failed outright (e.g. a browser relaunch) costs only its own row
+                    print(f"❌ Error processing row {futures[future]}: {e}")
+                    continue
+                rows_since_flush += 1
+                if rows_since_flush >= BATCH_ROWS or time.monotonic() - last_flush >= FLUSH_SECONDS:
+                    flush_updates(sheet, pending)
+                    rows_since_flush = 0
+                    last_flush = time.monotonic()
+    finally:
+        # Write whatever is still queued before shutting down
+        flush_updates(sheet, pending)
+        while not drivers.empty():
+            driver = drivers.get()[0]
+            if driver is not None:
+                quit_driver(driver)
+        print("🚪 Browsers closed.")
 
     print("🚀 All rows have been processed.")
 
@@ -1,34 +1,62 @@
+import os
 import asyncio
 from pyppeteer import launch
 
-async def fetch_page_html(url):
-    browser = await launch(
-        headless=True,
-        executablePath=r'C:\Program Files\Google\Chrome\Application\chrome.exe'  # Path to Chrome
-    )
-    page = await browser.newPage()
+URLS = [
+    "https://www.truepeoplesearch.com/find/address/w5861-clar-ken-rd_monroe-wi-53566",
+]
+CHROME_PATH = r'C:\Program Files\Google\Chrome\Application\chrome.exe'  # Path to Chrome
+MAX_PAGES = 5  # Tabs loading at the same time
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rapid_chrome_profile")  # Keeps cookies between runs (request interception disables the HTTP cache)
+CARD_SELECTOR = 'div.card.card-body.shadow-form.pt-3'  # Result cards read by process_page
+RESULT_BLOCK_SELECTOR = 'body > div:nth-of-type(2) > div > div:nth-of-type(2) > div:nth-of-type(5)'  # Was /html/body/div[2]/div/div[2]/div[5]
+BLOCKED_RESOURCE_TYPES = {"image", "stylesheet", "font", "media"}  # Only DOM text is read; skip the rest
+
+# Pairs each card's links with its span.h4 labels in order (arguments: space-separated card classes)
+EXTRACT_CARD_LINKS_JS = """
+(className) => {
+    const out = [];
+    const cardSelector = 'div.' + className.trim().split(/\\s+/).join('.');
+    for (const card of document.querySelectorAll(cardSelector)) {
+        const hrefs = Array.from(card.querySelectorAll('a[href]'), (a) => a.href);
+        const texts = Array.from(card.querySelectorAll('span.h4'), (s) => s.textContent);
+        const count = Math.min(hrefs.length, texts.length);
+        for (let k = 0; k < count; k++) {
+            out.push({href: hrefs[k], text: texts[k]});
+        }
+    }
+    return out;
+}
+"""
+
+# Abort requests for resources the scraper never reads; let everything else through
+async def block_heavy_requests(request):
+    if request.resourceType in BLOCKED_RESOURCE_TYPES:
+        await request.abort()
+    else:
+        await request.continue_()
 
-    # Set a realistic user-agent
-    await page.setUserAgent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36")
-    
+async def fetch_page_html(page, url):
     try:
-        # Navigate to the page with a timeout
-        await page.goto(url, {'waitUntil': 'networkidle2', 'timeout': 60000})
+        # Set a realistic user-agent
+        await page.setUserAgent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36")
+        await page.setRequestInterception(True)
+        page.on('request', lambda request: asyncio.ensure_future(block_heavy_requests(request)))
+
+        # Return once the DOM is parsed, then wait only for the result cards
+        await page.goto(url, {'waitUntil': 'domcontentloaded', 'timeout': 30000})
+        await page.waitForSelector(CARD_SELECTOR, {'timeout': 15000})
     except asyncio.TimeoutError:
         print(f"Timeout while fetching {url}")
     except Exception as e:
         print(f"Error fetching {url}: {e}")
 
-    return page, browser
+    return page
 
-async def extract_content_from_xpath(page, xpath):
-    # Use the XPath to find the content
-    elements = await page.xpath(xpath)
-    if elements:
-        # Extract text content from the element using page.evaluate
-        content = await page.evaluate('(element) => element.textContent', elements[0])
-        return content.strip()
-    return None
+async def extract_content(page, selector):
+    # Read the block's text in one round-trip instead of an XPath lookup plus a second evaluate
+    content = await page.evaluate('(sel) => { const el = document.querySelector(sel); return el ? el.textContent : null; }', selector)
+    return content.strip() if content else None
 
 async def modify_iframe_padding(page, iframe_xpath, padding_value):
     # Use XPath to find the iframe
@@ -42,43 +70,21 @@ async def modify_iframe_padding(page, iframe_xpath, padding_value):
         print("No iframe found at the specified XPath.")
 
 async def extract_hrefs_and_span_h4_within_class(page, class_name):
-    # Use XPath to find the container elements with the specified class name
-    elements = await page.xpath(f'//div[contains(@class, "{class_name}")]')
-
-    extracted_data = []
-
-    for element in elements:
-        # Extract hrefs
-        href_elements = await element.xpath('.//a[@href]')
-        hrefs = [await page.evaluate('(element) => element.href', el) for el in href_elements]
-
-        # Extract span.h4 texts using CSS selector
-        span_h4_elements = await element.xpath('.//span[contains(@class, "h4")]')
-        span_h4_texts = [await page.evaluate('(element) => element.textContent', el) for el in span_h4_elements]
-
-        # Combine hrefs and span.h4 texts
-        for href, text in zip(hrefs, span_h4_texts):
-            extracted_data.append({'href': href, 'text': text})
-
-    return extracted_data
+    # Walk every matching card in the page and return the zipped pairs in one round-trip
+    return await page.evaluate(EXTRACT_CARD_LINKS_JS, class_name)
 
-async def main():
-    url = "https://www.truepeoplesearch.com/find/address/w5861-clar-ken-rd_monroe-wi-53566"
-    page, browser = await fetch_page_html(url)
-    
+# Extract and print everything of interest from one loaded page
+async def process_page(page):
     if page:
         print("Page fetched successfully!")
 
-        # XPath you provided
-        xpath = '/html/body/div[2]/div/div[2]/div[5]'
-
-        # Extract content using XPath
-        content = await extract_content_from_xpath(page, xpath)
+        # Extract content using the result block's CSS selector
+        content = await extract_content(page, RESULT_BLOCK_SELECTOR)
 
         if content:
-            print(f"Content extracted from XPath: {content}")
+            print(f"Content extracted from result block: {content}")
         else:
-            print("No content found at the specified XPath.")
+            print("No content found at the result block selector.")
 
         # Extract hrefs and span.h4 texts within elements with class "card card-body shadow-form pt-3"
         class_name = 'card card-body shadow-form pt-3'
@@ -97,6 +103,35 @@ async def main():
     else:
         print("Failed to fetch the page.")
 
-    await browser.close()
+# Load and process one URL on its own tab once a slot is free
+async def process_url(browser, semaphore, url):
+    async with semaphore:
+        # The tab is closed here whatever happens while loading or reading it
+        page = await browser.newPage()
+        try:
+            await fetch_page_html(page, url)
+            await process_page(page)
+        finally:
+            await page.close()
+
+async def main():
+    # Drop blank and repeated entries before paying for a browser launch
+    unique_urls = dict.fromkeys(url.strip().rstrip('/') for url in URLS if url and url.strip())
+    if not unique_urls:
+        print("No URLs to fetch.")
+        return
+
+    # Launch Chromium once; every URL gets its own tab on it
+    browser = await launch(headless=True, executablePath=CHROME_PATH, userDataDir=PROFILE_DIR)
+    semaphore = asyncio.Semaphore(MAX_PAGES)
+    try:
+        # One failing URL must not close the browser under the tabs still loading
+        urls = list(unique_urls)
+        results = await asyncio.gather(*(process_url(browser, semaphore, url) for url in urls), return_exceptions=True)
+        for url, result in zip(urls, results):
+            if isinstance(result, BaseException):
+                print(f"Error processing {url}: {result}")
+    finally:
+        await browser.close()
 
 asyncio.run(main())